@@ -5,4 +5,8 @@ from magine.data.experimental_data import load_data
 file_path = os.path.join(os.path.dirname(__file__), 'Data',
                          'norris_et_al_2017_cisplatin_data.csv.gz')
 
-exp_data = load_data(file_path, low_memory=False)
+try:
+    exp_data = load_data(file_path, engine='pyarrow')
+except (ImportError, ValueError):
+    # pyarrow csv engine requires pyarrow and pandas >= 1.4
+    exp_data = load_data(file_path, low_memory=False)
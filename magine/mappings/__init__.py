@@ -16,8 +16,9 @@ Currently supported options
     drugbank_id, chemical_formula, smiles, metlin_id, average_molecular_weight
 
 """
-from magine.mappings.chemical_mapper import ChemicalMapper
+from magine.mappings.chemical_mapper import ChemicalMapper, \
+    get_chemical_mapper
 from magine.mappings.gene_mapper import GeneMapper
 
-__all__ = ['ChemicalMapper', 'GeneMapper']
+__all__ = ['ChemicalMapper', 'GeneMapper', 'get_chemical_mapper']
 
@@ -1,7 +1,11 @@
+import gzip
+import os
+
 import pandas as pd
 from bioservices import UniChem
-from sortedcontainers import SortedSet, SortedDict
 
+from magine.data.storage import id_mapping_dir
+from magine.logging import get_logger
 from magine.mappings.databases.download_libraries import HMDB
 
 try:
@@ -14,6 +18,8 @@ try:
 except:
     basestring = str
 
+logger = get_logger(__name__)
+
 
 class ChemicalMapper(object):
     """ Convert chemical species across various ids.
@@ -45,13 +51,13 @@ class ChemicalMapper(object):
         self._chem_name_to_hmdb = None
         self._hmdb_to_kegg = None
         self._kegg_to_hmdb = None
-        self.synonyms_to_hmdb = None
+        self._synonyms_to_hmdb = None
         self._drugbank_to_hmdb = None
         self._hmdb_to_protein = None
         self._hmdb_main_to_protein = None
         self._hmdb_accession_to_main = None
-        hmdb_database = HMDB().load_db()
-        self.database = hmdb_database.where((pd.notnull(hmdb_database)), None)
+        self._synonyms_lower = None
+        self.database = HMDB().load_db()
         self.database['main_accession'] = self.database['accession']
         sub_db = self.database[
             self.database['secondary_accessions'].str.contains('|', na=False)]
@@ -114,6 +120,31 @@ class ChemicalMapper(object):
             )
         return self._hmdb_accession_to_main
 
+    @property
+    def synonyms_to_hmdb(self):
+        if self._synonyms_to_hmdb is None:
+            self._synonyms_to_hmdb = self._synonym_index()
+        return self._synonyms_to_hmdb
+
+    def _synonym_index(self):
+        """ creates a dictionary of lowercase synonym to main accessions
+
+        Returns
+        -------
+        dict
+
+        """
+        d = self.database[['synonyms', 'main_accession']].dropna(how='any')
+        d = d.drop_duplicates('main_accession')
+        return_dict = dict()
+        for syns, acc in d.values:
+            for syn in syns.split('|'):
+                syn = syn.strip().lower()
+                if syn not in return_dict:
+                    return_dict[syn] = set()
+                return_dict[syn].add(acc)
+        return return_dict
+
     def _to_dict(self, key, value):
         """ creates a dictionary with a list of values for each key
 
@@ -127,34 +158,35 @@ class ChemicalMapper(object):
         dict
 
         """
-        d = self.database[[key, value]].copy()
-        d.dropna(how='any', inplace=True)
-        return_dict = SortedDict()
-        for i, j in d.values:
-            i = i.strip()
-            if i not in return_dict:
-                return_dict[i] = set()
-            return_dict[i].add(j)
+        d = self.database[[key, value]].dropna(how='any')
+        return_dict = dict()
+        for i, j in zip(d[key].str.strip().values, d[value].values):
+            if i in return_dict:
+                return_dict[i].add(j)
+            else:
+                return_dict[i] = {j}
         return return_dict
 
     def _from_list_dict(self, key, value):
-        d = self.database[[key, value]].copy()
-        d.dropna(how='any', inplace=True)
-        return_dict = SortedDict()
-        for i, j in d.values:
+        d = self.database[[key, value]].dropna(how='any')
+        return_dict = dict()
+        for i, j in zip(d[key].values, d[value].values):
             if i in return_dict:
                 return_dict[i].update(j.split('|'))
             else:
-                return_dict[i] = SortedSet(j.split('|'))
-        return return_dict
+                return_dict[i] = set(j.split('|'))
+        return {i: tuple(sorted(j)) for i, j in return_dict.items()}
 
-    def check_synonym_dict(self, term, format_name):
+    def check_synonym_dict(self, term, format_name, exact=False):
         """ checks hmdb database for synonyms and returns formatted name
 
         Parameters
         ----------
         term : str
         format_name : str
+        exact : bool
+            Only return species with a synonym equal to term (case
+            insensitive). Default matches any synonym containing term.
 
         Returns
         -------
@@ -166,14 +198,25 @@ class ChemicalMapper(object):
         >>> cm = ChemicalMapper()
         >>> cm.check_synonym_dict(term='dodecene', format_name='main_accession')
         ['HMDB0000933', 'HMDB0059874']
+        >>> cm.check_synonym_dict(term='dodecene', format_name='main_accession',
+        ...                       exact=True)
+        ['HMDB0059874']
 
         """
-        synonyms = self.database[['synonyms', format_name]].copy()
-        synonyms.dropna(how='any', inplace=True)
-        synonyms['synonyms'] = synonyms['synonyms'].str.lower()
-
-        hits = synonyms[synonyms['synonyms'].str.contains(term.lower())]
-        matches = sorted(set(hits[format_name].values))
+        if exact:
+            hmdb = self.synonyms_to_hmdb.get(term.strip().lower(), set())
+            if format_name == 'main_accession':
+                return sorted(hmdb)
+            mask = self.database['main_accession'].isin(hmdb)
+            hits = self.database.loc[mask.values, format_name].dropna()
+            return sorted(set(hits.values))
+
+        if self._synonyms_lower is None:
+            self._synonyms_lower = self.database['synonyms'].str.lower()
+        mask = self._synonyms_lower.str.contains(term.lower(), regex=False,
+                                                 na=False)
+        hits = self.database.loc[mask.values, format_name].dropna()
+        matches = sorted(set(hits.values))
         return matches
 
     def print_info(self):
@@ -204,52 +247,47 @@ class ChemicalMapper(object):
 
         """
 
-        chem = UniChem()
-
-        still_unknown = []
-        hits = [i for i in set(network.nodes) if i.startswith('cpd:')]
-        net_kegg_names = dict()
+        net_kegg_names = {i: i[4:] for i in set(network.nodes)
+                          if i.startswith('cpd:')}
         net_chem_names = dict()
         net_cpd_to_hmdb = dict()
-        for i in hits:
-
-            name_stripped = i.lstrip('cpd:')
-            net_kegg_names[i] = name_stripped
-
-            if name_stripped in self.kegg_to_hmdb:
-                mapping = self.kegg_to_hmdb[name_stripped]
-                if isinstance(mapping, (list, set, SortedSet)):
-                    names = '|'.join(set(mapping))
-                    chem_names = set()
-                    for name in mapping:
-                        try:
-                            chem_names.update(self.hmdb_to_chem_name[name])
-                        except:
-                            continue
-                    net_cpd_to_hmdb[i] = names
-                    net_chem_names[i] = order_merge(chem_names)
-
-                elif isinstance(mapping, basestring):
-
-                    chem_n = self.hmdb_to_chem_name[mapping]
-                    net_cpd_to_hmdb[i] = mapping
-                    net_chem_names[i] = '|'.join(chem_n.encode('ascii',
-                                                               'ignore'))
-                else:
-                    print('Returned something else...', mapping)
-
-            elif i in compound_manual:
-                loc = compound_manual[i]
-                net_cpd_to_hmdb[i] = loc
-                if loc in self.hmdb_to_chem_name:
-                    net_chem_names[i] = order_merge(
-                        self.hmdb_to_chem_name[loc])
+
+        known = {i for i, kegg in net_kegg_names.items()
+                 if kegg in self.kegg_to_hmdb}
+        for i in known:
+            mapping = self.kegg_to_hmdb[net_kegg_names[i]]
+            if isinstance(mapping, (list, set, tuple)):
+                names = '|'.join(set(mapping))
+                chem_names = set()
+                for name in mapping:
+                    try:
+                        chem_names.update(self.hmdb_to_chem_name[name])
+                    except:
+                        continue
+                net_cpd_to_hmdb[i] = names
+                net_chem_names[i] = order_merge(chem_names)
+
+            elif isinstance(mapping, basestring):
+
+                chem_n = self.hmdb_to_chem_name[mapping]
+                net_cpd_to_hmdb[i] = mapping
+                net_chem_names[i] = '|'.join(chem_n.encode('ascii',
+                                                           'ignore'))
             else:
-                still_unknown.append(i)
+                print('Returned something else...', mapping)
+
+        not_known = set(net_kegg_names).difference(known)
+        for i in not_known.intersection(compound_manual):
+            loc = compound_manual[i]
+            net_cpd_to_hmdb[i] = loc
+            if loc in self.hmdb_to_chem_name:
+                net_chem_names[i] = order_merge(self.hmdb_to_chem_name[loc])
+
+        still_unknown = not_known.difference(compound_manual)
         if len(still_unknown):
-            kegg_hmdb = chem.get_mapping("kegg_ligand", "hmdb")
+            kegg_hmdb = kegg_ligand_to_hmdb()
             for i in still_unknown:
-                name_stripped = i.lstrip('cpd:')
+                name_stripped = net_kegg_names[i]
                 if name_stripped in kegg_hmdb:
                     net_cpd_to_hmdb[i] = kegg_hmdb[name_stripped]
                 # else:
@@ -257,6 +295,80 @@ class ChemicalMapper(object):
         return net_cpd_to_hmdb, net_kegg_names, net_chem_names
 
 
+_chemical_mapper = None
+
+
+def get_chemical_mapper():
+    """ Returns a ChemicalMapper shared across the session
+
+    The HMDB database is only loaded once, on the first call.
+
+    Returns
+    -------
+    ChemicalMapper
+
+    """
+    global _chemical_mapper
+    if _chemical_mapper is None:
+        _chemical_mapper = ChemicalMapper()
+    return _chemical_mapper
+
+
+_kegg_ligand_to_hmdb = None
+
+
+def kegg_ligand_to_hmdb(fresh_download=False):
+    """ KEGG ligand to HMDB mapping from UniChem
+
+    The mapping is downloaded once and stored in the id mapping directory,
+    later calls reuse the stored copy.
+
+    Parameters
+    ----------
+    fresh_download : bool
+        Download the mapping again and replace the stored copy
+
+    Returns
+    -------
+    dict
+
+    """
+    global _kegg_ligand_to_hmdb
+    if _kegg_ligand_to_hmdb is not None and not fresh_download:
+        return _kegg_ligand_to_hmdb
+
+    p_name = os.path.join(id_mapping_dir, 'unichem_kegg_to_hmdb.p.gz')
+    if os.path.exists(p_name) and not fresh_download:
+        try:
+            with gzip.open(p_name, 'rb') as f:
+                _kegg_ligand_to_hmdb = pickle.load(f)
+            return _kegg_ligand_to_hmdb
+        except Exception as e:
+            logger.warning("Could not read {} ({}), downloading it "
+                           "again".format(p_name, e))
+            os.remove(p_name)
+
+    mapping = UniChem().get_mapping("kegg_ligand", "hmdb")
+    # failed queries are not stored so the next call tries again
+    if not isinstance(mapping, dict) or len(mapping) == 0:
+        logger.warning("Could not download KEGG ligand to HMDB mapping "
+                       "from UniChem")
+        return dict()
+    # write to a temporary file first so an interrupted write never leaves
+    # a truncated cache behind
+    tmp_name = p_name + '.tmp'
+    try:
+        with gzip.open(tmp_name, 'wb', compresslevel=1) as f:
+            pickle.dump(mapping, f, protocol=-1)
+        # os.replace is python 3 only
+        getattr(os, 'replace', os.rename)(tmp_name, p_name)
+    finally:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+    _kegg_ligand_to_hmdb = mapping
+    return _kegg_ligand_to_hmdb
+
+
 compound_manual = {'cpd:C07909': 'HMDB0015015',
                    'cpd:C16844': 'HMDB0001039',
                    'cpd:C00076': 'HMDB0000464',
@@ -295,19 +407,19 @@ def tidy_split(df, column, sep='|', keep=False):
     pandas.DataFrame
         Returns a dataframe with the same columns as `df`.
     """
-    indexes = list()
-    new_values = list()
-    df = df.dropna(subset=[column])
-    for i, presplit in enumerate(df[column].astype(str)):
-        values = presplit.split(sep)
-        if keep and len(values) > 1:
-            indexes.append(i)
-            new_values.append(presplit)
-        for value in values:
-            indexes.append(i)
-            new_values.append(value)
-    new_df = df.iloc[indexes, :].copy()
-    new_df[column] = new_values
+    new_df = df.dropna(subset=[column]).copy()
+    values = new_df[column].astype(str).str.split(sep)
+    if keep:
+        values = values.apply(
+            lambda x: [sep.join(x)] + x if len(x) > 1 else x
+        )
+    if hasattr(new_df, 'explode'):
+        new_df[column] = values
+        return new_df.explode(column)
+    # pandas < 0.25 (the last releases supporting python 2) lacks explode
+    indexes = [i for i, split in enumerate(values) for _ in split]
+    new_df = new_df.iloc[indexes, :].copy()
+    new_df[column] = [value for split in values for value in split]
     return new_df
 
 
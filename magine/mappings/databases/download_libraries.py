@@ -10,6 +10,12 @@ from defusedxml import cElementTree as ElementTree
 from magine.data.storage import id_mapping_dir
 from magine.logging import get_logger
 
+try:
+    import pyarrow
+    _has_pyarrow = True
+except ImportError:
+    _has_pyarrow = False
+
 logger = get_logger('magine.downloads', log_level=logging.INFO)
 
 
@@ -168,13 +174,50 @@ class HMDB(object):
         self.tmp_dir = id_mapping_dir
         self.target_file = 'hmdb_metabolites.zip'
         self.out_name = os.path.join(id_mapping_dir, 'hmdb_dataframe.csv.gz')
+        self.feather_name = os.path.join(id_mapping_dir,
+                                         'hmdb_dataframe.feather')
 
     def load_db(self):
+        """ load HMDB as a pandas.DataFrame
+
+        If pyarrow is installed, a feather copy of the csv is stored on the
+        first load and used for later loads, as long as it is not older than
+        the csv.
+
+        """
+        if _has_pyarrow and self._feather_is_current():
+            return pd.read_feather(self.feather_name)
         if not os.path.exists(self.out_name):
             self.download_db()
         df = pd.read_csv(self.out_name, low_memory=False, encoding='utf-8')
+        if _has_pyarrow:
+            self._write_feather(df)
         return df
 
+    def _feather_is_current(self):
+        if not os.path.exists(self.feather_name):
+            return False
+        if not os.path.exists(self.out_name):
+            return False
+        return os.path.getmtime(self.feather_name) >= \
+            os.path.getmtime(self.out_name)
+
+    def _write_feather(self, df):
+        """ stores the feather copy, a failure only costs the speed up """
+        tmp_name = self.feather_name + '.tmp'
+        try:
+            df.to_feather(tmp_name)
+            # os.replace is python 3 only
+            getattr(os, 'replace', os.rename)(tmp_name, self.feather_name)
+        except Exception as e:
+            logger.warning("Could not store feather copy of HMDB: "
+                           "{}".format(e))
+            if os.path.exists(tmp_name):
+                try:
+                    os.remove(tmp_name)
+                except OSError:
+                    pass
+
     def download_db(self):
         """ parse HMDB to Pandas.DataFrame
 
@@ -203,6 +246,8 @@ class HMDB(object):
 
         df.to_csv(self.out_name, index=False, encoding='utf-8',
                   compression='gzip', tupleize_cols=True)
+        if os.path.exists(self.feather_name):
+            os.remove(self.feather_name)
         logger.info("Done processing HMDB")
 
     def _unzip_hmdb(self, out_directory):
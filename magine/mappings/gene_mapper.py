@@ -23,9 +23,9 @@ class GeneMapper(object):
 
     def __init__(self, species='hsa'):
         self.species = species
-        self.hgnc = load_hgnc()
-        self.ncbi = load_ncbi()
-        self.uniprot = load_uniprot()
+        self._hgnc = None
+        self._ncbi = None
+        self._uniprot = None
         self._gene_name_to_uniprot = None
         self._gene_name_to_alias_name = None
         self._gene_name_to_ensembl = None
@@ -36,6 +36,24 @@ class GeneMapper(object):
         self._kegg_to_uniprot = None
         self._ncbi_to_symbol = None
 
+    @property
+    def hgnc(self):
+        if self._hgnc is None:
+            self._hgnc = load_hgnc()
+        return self._hgnc
+
+    @property
+    def ncbi(self):
+        if self._ncbi is None:
+            self._ncbi = load_ncbi()
+        return self._ncbi
+
+    @property
+    def uniprot(self):
+        if self._uniprot is None:
+            self._uniprot = load_uniprot()
+        return self._uniprot
+
     @property
     def gene_name_to_uniprot(self):
         if self._gene_name_to_uniprot is None:
@@ -116,9 +134,10 @@ class GeneMapper(object):
         hits = synonyms.loc[synonyms[index].str.contains(term.upper())].copy()
         hits[index] = hits[index].str.split('|')
 
-        for i, row in hits.iterrows():
-            if term in row[index]:
-                return [row[format_name]]
+        for aliases, name in zip(hits[index].values,
+                                 hits[format_name].values):
+            if term in aliases:
+                return [name]
         matches = sorted(set(hits[format_name].values))
         return matches
 
@@ -5,7 +5,7 @@ Mapping between data identifiers
 
 import networkx as nx
 
-from magine.mappings.chemical_mapper import ChemicalMapper
+from magine.mappings.chemical_mapper import get_chemical_mapper
 from magine.mappings.gene_mapper import GeneMapper
 
 try:
@@ -14,7 +14,7 @@ except ImportError:
     import pickle as pickle
 
 gm = GeneMapper()
-cm = ChemicalMapper()
+cm = get_chemical_mapper()
 
 
 def convert_all(network, species='hsa', verbose=False):
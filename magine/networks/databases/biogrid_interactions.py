@@ -5,7 +5,7 @@ import pandas as pd
 
 import magine.networks.utils as utils
 from magine.data.storage import network_data_dir
-from magine.mappings.chemical_mapper import ChemicalMapper
+from magine.mappings.chemical_mapper import get_chemical_mapper
 
 p_name = os.path.join(network_data_dir, 'biogrid.p.gz')
 _base_url = 'https://thebiogrid.org/downloads/archives/Latest%20Release/'
@@ -19,7 +19,7 @@ class BioGridDownload(object):
         self.url = _protein_url
         self.url2 = _chem_url
         self._db_name = 'BioGrid'
-        self._cm = ChemicalMapper()
+        self._cm = get_chemical_mapper()
 
     def _create_chemical_network(self):
         df = pd.read_csv(self.url2,
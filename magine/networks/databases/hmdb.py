@@ -23,9 +23,9 @@ def load_hmdb_network(fresh_download=False, verbose=False):
     if not fresh_download and os.path.exists(out_name):
         tmp_graph = nx.read_gpickle(out_name)
     else:
-        from magine.mappings.chemical_mapper import ChemicalMapper
+        from magine.mappings.chemical_mapper import get_chemical_mapper
 
-        cm = ChemicalMapper()
+        cm = get_chemical_mapper()
 
         tmp_graph = nx.DiGraph()
 
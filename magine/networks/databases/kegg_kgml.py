@@ -269,17 +269,17 @@ def load_kegg_mappings(species, fresh_download=False, verbose=False):
 
 
 def save_gzip_pickle(file_name, obj):
-    with gzip.open(file_name, 'wb') as f:
-        f.write(pickle.dumps(obj, protocol=-1))
+    with gzip.open(file_name, 'wb', compresslevel=1) as f:
+        pickle.dump(obj, f, protocol=-1)
 
 
 def load_gz_p(file_name):
     with gzip.open(file_name, 'rb') as f:
-        data = f.read()
-    try:
-        return pickle.loads(data, encoding='utf-8')
-    except:
-        return pickle.loads(data)
+        try:
+            return pickle.load(f, encoding='utf-8')
+        except:
+            f.seek(0)
+            return pickle.load(f)
 
 
 if __name__ == '__main__':
@@ -5,7 +5,7 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import magine.networks.utils as nt
 import magine.networks.databases as db
-from magine.mappings.chemical_mapper import ChemicalMapper
+from magine.mappings.chemical_mapper import get_chemical_mapper
 from magine.mappings.gene_mapper import GeneMapper
 
 try:
@@ -13,7 +13,7 @@ try:
 except ImportError:
     import pickle
 
-cm = ChemicalMapper()
+cm = get_chemical_mapper()
 
 
 def build_network(seed_species, species='hsa', save_name=None,
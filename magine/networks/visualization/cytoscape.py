@@ -1,5 +1,6 @@
 import os
 import time
+from multiprocessing.pool import ThreadPool
 
 import matplotlib.image as mpimg
 import matplotlib.pyplot as plt
@@ -8,6 +9,8 @@ import numpy as np
 import pandas as pd
 import requests
 
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 from py2cytoscape.data.cyrest_client import CyRestClient
 
 IP = 'localhost'
@@ -79,8 +82,9 @@ class RenderModel(object):
         self.cy.session.delete()
         self.cy.layout2 = LayoutClient()
 
-        for n, (i, j) in enumerate(self.graph.edges()):
-            self.graph[i][j]['name'] = '{},{}'.format(i, j)
+        edge_names = {(i, j): '{},{}'.format(i, j)
+                      for i, j in self.graph.edges()}
+        nx.set_edge_attributes(self.graph, edge_names, 'name')
         self.g_cy = self.cy.network.create_from_networkx(self.graph)
 
         time.sleep(2)
@@ -154,9 +158,8 @@ class RenderModel(object):
             if not os.path.exists(os.path.join(out_dir, 'Figures')):
                 os.mkdir(os.path.join(out_dir, 'Figures'))
 
-        edge_width = {}
-        for i, j, d in self.graph.edges(data=True):
-            edge_width[self.edge_name2id['{},{}'.format(i, j)]] = d['weight']
+        edge_width = {self.edge_name2id[d['name']]: d['weight']
+                      for _, _, d in self.graph.edges(data=True)}
 
         _min, _max = min(edge_width.values()), max(edge_width.values())
         self.style.create_passthrough_mapping('name', vp='NODE_LABEL')
@@ -167,18 +170,23 @@ class RenderModel(object):
 
         self.cy.style.apply(style=self.style, network=self.g_cy)
 
-        node_label_colors = {self.node_name2id[i]: 'black' for i in
-                             self.graph.nodes}
+        # gather node ids, colors and sizes in one pass over the nodes
+        columns = ['sample{}'.format(j) for j in list_of_time]
+        node_ids = []
+        node_colors = []
+        all_node_size = []
+        for i, d in self.graph.nodes(data=True):
+            node_ids.append(self.node_name2id[i])
+            node_colors.append(d['color'])
+            all_node_size.append([d[c] for c in columns])
+        size = np.array(all_node_size, dtype=float)
 
-        node_color_values = {self.node_name2id[i]: d['color'] for i, d in
-                             self.graph.nodes(data=True)}
         # do all node changes
         df_vs_node = pd.DataFrame(
-            [node_label_colors, node_color_values],
-            index=['NODE_LABEL_COLOR', 'NODE_FILL_COLOR'],
+            {'NODE_LABEL_COLOR': 'black', 'NODE_FILL_COLOR': node_colors},
+            index=node_ids,
+            columns=['NODE_LABEL_COLOR', 'NODE_FILL_COLOR'],
         )
-
-        df_vs_node = df_vs_node.T
         df_vs_node['NODE_BORDER_PAINT'] = df_vs_node['NODE_LABEL_COLOR']
 
         # do all edge changes
@@ -205,53 +213,50 @@ class RenderModel(object):
             value=0.8 * x['NETWORK_SCALE_FACTOR']
         )
 
-        x = self.view1.get_network_view_as_dict()
+        width = int(self.view1.get_network_view_as_dict()['NETWORK_WIDTH'])
         self.create_png('out.png', 2400)
         trip_photo('out.png', 'x')
 
-        all_node_size = []
-        for ind, j in enumerate(list_of_time):
-            size = np.array([self.graph.node[n]['sample{}'.format(j)]
-                             for n in self.graph.nodes])
-            all_node_size.append(size)
-        size = np.array(all_node_size).flatten()
         simple_slope = create_slope(min_val=size.min(), max_val=size.max(),
                                     values=(10, 50))
 
-        for j in sorted(list_of_time):
-            time.sleep(1)
-            self.style.create_continuous_mapping(column='sample{}'.format(j),
-                                                 col_type='Double',
-                                                 vp='NODE_SIZE',
-                                                 points=simple_slope)
-            self.cy.style.apply(style=self.style, network=self.g_cy)
-
-            fig_name = '{0}_{1}'.format(prefix, j)
-            print("Saving {}".format(fig_name))
-
-            if out_dir is not None:
-                out_file = os.path.join(out_dir, 'Figures',
-                                        '{}.png'.format(fig_name))
-            else:
-                out_file = '{}.png'.format(fig_name)
-
-            if os.path.exists(out_file):
-                os.remove(out_file)
-
-            x = self.view1.get_network_view_as_dict()
-            self.create_png(out_file, int(x['NETWORK_WIDTH']))
-            if labels is None:
-                trip_photo(out_file, j)
-            else:
-                trip_photo(out_file, j)
+        # images are cropped and titled in the background while cytoscape
+        # renders the next time point
+        pool = ThreadPool(1)
+        formatting = []
+        try:
+            for j in sorted(list_of_time):
+                time.sleep(1)
+                self.style.create_continuous_mapping(
+                    column='sample{}'.format(j), col_type='Double',
+                    vp='NODE_SIZE', points=simple_slope
+                )
+                self.cy.style.apply(style=self.style, network=self.g_cy)
+
+                fig_name = '{0}_{1}'.format(prefix, j)
+                print("Saving {}".format(fig_name))
+
+                if out_dir is not None:
+                    out_file = os.path.join(out_dir, 'Figures',
+                                            '{}.png'.format(fig_name))
+                else:
+                    out_file = '{}.png'.format(fig_name)
+
+                if os.path.exists(out_file):
+                    os.remove(out_file)
+
+                self.create_png(out_file, width)
+                formatting.append(
+                    pool.apply_async(trip_photo, (out_file, j))
+                )
+        finally:
+            pool.close()
+            pool.join()
+        for result in formatting:
+            result.get()
 
     def update_node_color(self, attribute, save_name):
         self.cy.style.apply(style=self.style, network=self.g_cy)
-        node_color_values = {self.node_name2id[i[0]]: i[1][attribute] for i in
-                             self.graph.nodes(data=True)}
-
-        self.view1.update_node_views(visual_property='NODE_FILL_COLOR',
-                                     values=node_color_values)
         node_label_colors = {self.node_name2id[i]: 'black' for i in
                              self.graph.nodes}
         node_labels = {self.node_name2id[i]: i for i in self.graph.nodes()}
@@ -326,17 +331,20 @@ def trip_photo(im_location, title=None):
 
     img = img[np.ix_(mask.any(1), mask.any(0))]
 
-    plt.imshow(img, interpolation='none')
-    plt.xticks([])
-    plt.yticks([])
+    # uses a standalone figure so it can run outside of the main thread
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    ax.imshow(img, interpolation='none')
+    ax.set_xticks([])
+    ax.set_yticks([])
     if title is not None:
-        plt.title(title, fontsize=24)
-    plt.axis('off')
+        ax.set_title(title, fontsize=24)
+    ax.axis('off')
     out = im_location.replace('.png', '_formatted.png')
     out2 = im_location.replace('.png', '_formatted.svg')
-    plt.savefig(out, dpi=1000, bbox_inches='tight', transparent=True)
-    plt.savefig(out2, bbox_inches='tight', transparent=True)
-    plt.close()
+    fig.savefig(out, dpi=1000, bbox_inches='tight', transparent=True)
+    fig.savefig(out2, bbox_inches='tight', transparent=True)
 
 
 def trip_photo_old(im_location, title=None):
@@ -1,10 +1,15 @@
+import os
+import shutil
+import tempfile
+
 import networkx as nx
 from nose.tools import ok_
 
-from magine.mappings.chemical_mapper import ChemicalMapper
+import magine.mappings.chemical_mapper as chemical_mapper
+from magine.mappings.chemical_mapper import get_chemical_mapper
 from magine.mappings.gene_mapper import GeneMapper
 
-cm = ChemicalMapper()
+cm = get_chemical_mapper()
 gm = GeneMapper()
 
 
@@ -16,6 +21,16 @@ class TestChemicalMapper(object):
 
         ok_((hmdb == ['HMDB0000933', 'HMDB0059874']))
 
+    def test_exact_synonyms(self):
+        hmdb = cm.check_synonym_dict(term='dodecene',
+                                     format_name='main_accession',
+                                     exact=True)
+
+        ok_((hmdb == ['HMDB0059874']))
+
+    def test_shared_instance(self):
+        ok_(get_chemical_mapper() is cm)
+
     def test_protein_network(self):
         item = 'HMDB42489'
         hit_list = ['PNLIP', 'LIPC', 'LIPA', 'PNLIPRP1', 'PNPLA3', 'LIPF',
@@ -72,6 +87,62 @@ def test_kegg_to_hmdb():
     ok_(g.node['HMDB0060180']['keggName'] == 'C00197')
 
 
+class _FakeUniChem(object):
+    mapping = None
+
+    def get_mapping(self, source, target):
+        return _FakeUniChem.mapping
+
+
+def test_kegg_ligand_to_hmdb_cache():
+    """
+    tests that only valid UniChem mappings are stored and reused
+    :return:
+    """
+    tmp_dir = tempfile.mkdtemp()
+    p_name = os.path.join(tmp_dir, 'unichem_kegg_to_hmdb.p.gz')
+    old = (chemical_mapper.UniChem, chemical_mapper.id_mapping_dir,
+           chemical_mapper._kegg_ligand_to_hmdb)
+    chemical_mapper.UniChem = _FakeUniChem
+    chemical_mapper.id_mapping_dir = tmp_dir
+    try:
+        # failed queries are not stored
+        for failed in (None, {}, 'error'):
+            chemical_mapper._kegg_ligand_to_hmdb = None
+            _FakeUniChem.mapping = failed
+            ok_(chemical_mapper.kegg_ligand_to_hmdb() == {})
+            ok_(not os.path.exists(p_name))
+
+        # a valid mapping is stored and read back from disk
+        chemical_mapper._kegg_ligand_to_hmdb = None
+        _FakeUniChem.mapping = {'C00001': 'HMDB0002111'}
+        chemical_mapper.kegg_ligand_to_hmdb()
+        ok_(os.path.exists(p_name))
+        ok_(not os.path.exists(p_name + '.tmp'))
+        chemical_mapper._kegg_ligand_to_hmdb = None
+        _FakeUniChem.mapping = None
+        ok_(chemical_mapper.kegg_ligand_to_hmdb() ==
+            {'C00001': 'HMDB0002111'})
+
+        # a truncated file is replaced with a new download
+        with open(p_name, 'rb') as f:
+            data = f.read()
+        with open(p_name, 'wb') as f:
+            f.write(data[:len(data) // 2])
+        chemical_mapper._kegg_ligand_to_hmdb = None
+        _FakeUniChem.mapping = {'C00002': 'HMDB0000538'}
+        ok_(chemical_mapper.kegg_ligand_to_hmdb() ==
+            {'C00002': 'HMDB0000538'})
+        chemical_mapper._kegg_ligand_to_hmdb = None
+        _FakeUniChem.mapping = None
+        ok_(chemical_mapper.kegg_ligand_to_hmdb() ==
+            {'C00002': 'HMDB0000538'})
+    finally:
+        (chemical_mapper.UniChem, chemical_mapper.id_mapping_dir,
+         chemical_mapper._kegg_ligand_to_hmdb) = old
+        shutil.rmtree(tmp_dir)
+
+
 def test_kegg_to_uniprot():
     """
     tests kegg gene to gene name
@@ -1,25 +1,68 @@
 #!python
+import os
+import shutil
+import time
+import zipfile
+from multiprocessing.pool import ThreadPool
 
 import magine.mappings.databases.download_libraries as dl
 import magine.networks.databases as nd
 
 
+def _retry(func, attempts=3, wait=30):
+    """ Calls func, retrying with an increasing wait if it raises """
+    for attempt in range(1, attempts + 1):
+        try:
+            return func()
+        except Exception as e:
+            if attempt == attempts:
+                raise
+            print("{} failed ({}), retrying in {} seconds".format(
+                func.__name__, e, wait * attempt))
+            time.sleep(wait * attempt)
+
+
+def _run_all(tasks):
+    """ Runs independent downloads concurrently """
+    pool = ThreadPool(len(tasks))
+    try:
+        return pool.map(_retry, tasks)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def download_hmdb():
+    """ Downloads HMDB, removing partial files if it fails
+
+    HMDB skips the download if the zip exists and the unzipping if the
+    HMDB directory has files, so both are cleared for a retry.
+    """
+    hmdb = dl.HMDB()
+    zip_file = os.path.join(hmdb.tmp_dir, hmdb.target_file)
+    out_dir = os.path.join(hmdb.tmp_dir, 'HMDB')
+    try:
+        hmdb.download_db()
+    except Exception:
+        if os.path.exists(out_dir):
+            shutil.rmtree(out_dir)
+        if os.path.exists(zip_file) and not zipfile.is_zipfile(zip_file):
+            os.remove(zip_file)
+        raise
+
+
 def download_id_mapping():
-    dl.download_hgnc()
-    dl.download_ncbi()
-    dl.download_uniprot()
+    _run_all([dl.download_hgnc, dl.download_ncbi, dl.download_uniprot,
+              download_hmdb])
 
 
 def download_network_dbs():
-    nd.load_reactome_fi()
-    nd.download_signor()
-    nd.load_biogrid_network()
-    dl.HMDB()
+    # requires the id mapping databases
+    _run_all([nd.load_reactome_fi, nd.download_signor,
+              nd.load_biogrid_network])
 
 
 if __name__ == '__main__':
-    import time
-
     st = time.time()
     download_id_mapping()
     download_network_dbs()